@@ -23,13 +23,13 @@
 import logging
 import re
 from math import inf
-from urllib.parse import urlsplit
 
 from scrapy.exceptions import NotConfigured
 
 from ..docs import OptionsContributor
 from ..requests import ProbeFeed
 from ..signals import register_state, start_from_scratch
+from ..urlkit import get_netloc
 
 
 class KeywordPrioritizer(OptionsContributor, _doc_order=-5):
@@ -57,13 +57,21 @@ class KeywordPrioritizer(OptionsContributor, _doc_order=-5):
         if not weighted_kws:
             raise NotConfigured()
 
-        self.keywords = {p: re.compile(r'(?:%s)' % '|'.join(kws), re.IGNORECASE)
-                         for p, kws in weighted_kws.items()}
-        self.keywords_fullword = {p: re.compile(r'\b(?:%s)\b' % '|'.join(kws), re.IGNORECASE)
-                                  for p, kws in weighted_kws.items()}
+        # Lowest weights first, so that a -inf match ends the scan right away.
+        weighted_kws = sorted(weighted_kws.items(), key=lambda t: t[0])
+        self.keywords = tuple((p, re.compile(r'(?:%s)' % '|'.join(kws), re.IGNORECASE))
+                              for p, kws in weighted_kws)
+        self.keywords_fullword = tuple((p, re.compile(r'\b(?:%s)\b' % '|'.join(kws), re.IGNORECASE))
+                                       for p, kws in weighted_kws)
+        # Plain-word keywords can be matched against an item's (lowercased)
+        # keyword set directly, without scanning its text.
+        self.keywords_literal = tuple(frozenset(k.lower() for k in kws if re.fullmatch(r'\w+', k))
+                                      for _, kws in weighted_kws)
 
         self.priorities = {}
         self.starting_weight = 0
+        self._target_deltas = {}
+        self._item_delta = (None, 0)
 
     def clear_state_info(self):
         self.priorities.clear()
@@ -74,9 +82,23 @@ class KeywordPrioritizer(OptionsContributor, _doc_order=-5):
         prio = self.priorities.setdefault(target, self.starting_weight + starting)
         if prio is None:
             return True
-        delta = 0
+        if prio == -inf:
+            return
+        delta = self.get_target_delta(source, target)
+        if delta == -inf:
+            prios[target] = -inf
+            return
+
+        prios[target] = prio + delta + self.get_item_delta(item)
 
-        for p, r in self.keywords.items():
+    def get_target_delta(self, source, target):
+        # Depends only on the domain, which is seen again for every item mentioning it.
+        delta = self._target_deltas.get(target)
+        if delta is not None:
+            return delta
+
+        delta = 0
+        for p, r in self.keywords:
             s = r.search(target)
             if not s:
                 continue
@@ -85,23 +107,36 @@ class KeywordPrioritizer(OptionsContributor, _doc_order=-5):
             if delta == -inf:
                 break
 
-        if delta == -inf:
-            prios[target] = -inf
-            return
+        self._target_deltas[target] = delta
+        return delta
 
-        phrases = list(item.keywords)
-        phrases.extend([item.markup.get('summary', ''), item.title])
-        phrases = ' '.join(phrases)
-        for p, r in self.keywords_fullword.items():
-            s = r.search(phrases)
-            if not s:
-                continue
+    def get_item_delta(self, item):
+        # Probes discovered from the same item arrive back to back,
+        # so remembering the last item is enough to score its text only once.
+        last, delta = self._item_delta
+        if last is item:
+            return delta
+
+        delta = 0
+        phrases = None
+        for (p, r), literals in zip(self.keywords_fullword, self.keywords_literal):
+            hits = literals.intersection(item.keywords)
+            if hits:
+                found = next(iter(hits))
+            else:
+                if phrases is None:
+                    phrases = ' '.join([*item.keywords, item.markup.get('summary', ''), item.title])
+                s = r.search(phrases)
+                if not s:
+                    continue
+                found = s.group(0)
             delta += p
-            self.log.debug(f'{source} {target} {s.group(0)} {p}')
+            self.log.debug(f'{item.url} {found} {p}')
             if delta == -inf:
                 break
 
-        prios[target] = prio + delta
+        self._item_delta = (item, delta)
+        return delta
 
     def process_spider_output(self, response, result, spider):
         for res in result:
@@ -115,8 +150,8 @@ class KeywordPrioritizer(OptionsContributor, _doc_order=-5):
                 yield res
                 continue
 
-            source = urlsplit(item.url).netloc
-            target = urlsplit(feed_url).netloc
+            source = get_netloc(item.url)
+            target = get_netloc(feed_url)
             self.update_priority(item, source, target)
 
             prio = self.priorities.get(target, 0)
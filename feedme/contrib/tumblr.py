@@ -1,9 +1,8 @@
-from urllib.parse import urlsplit
-
 from scrapy import Request
 from scrapy.exceptions import NotConfigured
 
 from ..docs import OptionsContributor
+from ..urlkit import get_netloc
 
 
 class TumblrFilter(OptionsContributor, _doc_order=-5):
@@ -12,9 +11,10 @@ class TumblrFilter(OptionsContributor, _doc_order=-5):
         return cls(crawler.settings)
 
     def __init__(self, settings):
-        self.domains = settings.get('TUMBLR_IGNORE')
-        if not self.domains:
+        domains = settings.getlist('TUMBLR_IGNORE')
+        if not domains:
             raise NotConfigured()
+        self.domains = frozenset(domains)
 
     def process_spider_output(self, response, result, spider):
         for r in result:
@@ -27,10 +27,8 @@ class TumblrFilter(OptionsContributor, _doc_order=-5):
                 yield r
                 continue
 
-            domain = urlsplit(feed_url).netloc
-            if domain in self.domains:
-                continue
-            if domain[-16:] == 'media.tumblr.com':
+            domain = get_netloc(feed_url)
+            if domain in self.domains or domain.endswith('media.tumblr.com'):
                 continue
             yield r
 
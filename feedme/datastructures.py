@@ -22,6 +22,8 @@
 
 from __future__ import annotations
 
+from bisect import bisect_left, insort
+from collections import Counter, deque
 from collections.abc import (Hashable, MutableMapping, MutableSequence,
                              MutableSet)
 from collections.abc import Set as SetCollection
@@ -155,6 +157,55 @@ class KeywordStore:
         return {item: self._taggings[hash_] for hash_, item in self._index.items()}
 
 
+class RollingStats:
+    def __init__(self, maxlen):
+        self._values = deque(maxlen=maxlen)
+        self._sorted = []
+        self._counter = Counter()
+        self.sum = 0
+
+    def append(self, v):
+        values = self._values
+        if len(values) == values.maxlen:
+            if not values:
+                return
+            self._discard(values[0])
+        values.append(v)
+        self.sum += v
+        self._counter[v] += 1
+        insort(self._sorted, v)
+
+    def _discard(self, v):
+        self.sum -= v
+        counter = self._counter
+        counter[v] -= 1
+        if not counter[v]:
+            del counter[v]
+        del self._sorted[bisect_left(self._sorted, v)]
+
+    @property
+    def min(self):
+        return self._sorted[0]
+
+    @property
+    def max(self):
+        return self._sorted[-1]
+
+    @property
+    def mean(self):
+        return self.sum / len(self._values)
+
+    @property
+    def mode(self):
+        return self._counter.most_common(1)[0][0]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+
 def labeled_sequence(seq, key=True, start=0, as_str=False):
     r = range(start, len(seq) + start)
     if key:
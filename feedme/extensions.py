@@ -22,20 +22,21 @@
 
 import atexit
 import gzip
+import io
 import logging
 import os
 import pickle
 import shutil
 import time
 from collections import defaultdict, deque
-from concurrent.futures.thread import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
 from contextlib import suppress
 from datetime import datetime, timedelta
 from importlib.util import module_from_spec, spec_from_file_location
-from itertools import permutations
+from itertools import chain, permutations, repeat
 from pathlib import Path
-from statistics import mean, mode
 from threading import Event, Thread
+from urllib.parse import urlsplit
 
 import simplejson as json
 from scrapy.crawler import Crawler
@@ -45,9 +46,10 @@ from scrapy.settings import BaseSettings
 from scrapy.signals import (engine_stopped, request_dropped,
                             request_reached_downloader, request_scheduled,
                             spider_closed, spider_opened)
+from scrapy.utils.url import add_http_if_no_scheme
 from twisted.internet import task
 
-from .datastructures import compose_mappings
+from .datastructures import RollingStats, compose_mappings
 from .docs import OptionsContributor
 from .requests import reconstruct_request
 from .signals import (register_state, request_finished, resume_requests,
@@ -56,6 +58,32 @@ from .spiders.settings import SettingsAdapter
 from .utils import colored as _
 from .utils import fmttimedelta, sha1sum
 
+try:
+    import orjson
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj)
+
+    _json_loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+
+    _json_loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+_MISSING = object()
+_SHELF_NAMES = tuple(f'{a}{b}' for a, b in permutations('0123456789abcdef', 2))
+_SETTINGS_ADAPTERS = {k: getattr(SettingsAdapter, k) for k in dir(SettingsAdapter)
+                      if not k.startswith('_') and callable(getattr(SettingsAdapter, k))}
+
+
+def _write_bytes(path, data):
+    tmp = path.with_name(f'{path.name}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
 
 class _LoggingHelper:
     @classmethod
@@ -68,8 +96,6 @@ class _LoggingHelper:
 class PresetLoader:
     @classmethod
     def from_crawler(cls, crawler: Crawler):
-        import re
-
         settings: BaseSettings = crawler.settings
         if 'PRESET' in settings or 'preset' in settings:
             raise NotConfigured()
@@ -86,19 +112,15 @@ class PresetLoader:
         try:
             sites = {}
             SettingsLoader.from_pyfile(sites, auto_load)
-            sites = sites['_SITES']
-        except (OSError, ImportError, KeyError):
+        except (OSError, ImportError):
             raise NotConfigured()
 
         feed = settings['RSS'] or settings['rss']
         if not feed:
             raise NotConfigured()
 
-        preset = None
-        for r, p in sites.items():
-            if re.match(r, feed):
-                preset = p
-                break
+        preset = (cls.select_by_suffix(feed, sites.get('_SITES_SUFFIX'))
+                  or cls.select_by_pattern(feed, sites.get('_SITES')))
         if not preset:
             raise NotConfigured()
 
@@ -114,6 +136,25 @@ class PresetLoader:
 
         return cls()
 
+    @staticmethod
+    def select_by_suffix(feed, suffixes):
+        if not suffixes:
+            return None
+        host = urlsplit(add_http_if_no_scheme(feed)).hostname or ''
+        for suffix, preset in suffixes.items():
+            if host.endswith(suffix):
+                return preset
+
+    @staticmethod
+    def select_by_pattern(feed, patterns):
+        import re
+
+        if not patterns:
+            return None
+        for r, p in patterns.items():
+            if re.match(r, feed):
+                return p
+
 
 class SettingsLoader:
     @classmethod
@@ -134,7 +175,7 @@ class SettingsLoader:
 
         adapted = BaseSettings(priority=50)
         for k, v in settings.items():
-            adapt = getattr(SettingsAdapter, k.lower(), None)
+            adapt = _SETTINGS_ADAPTERS.get(k.lower())
             if adapt:
                 adapted.update(adapt(v))
             else:
@@ -146,13 +187,9 @@ class SettingsLoader:
 
     @classmethod
     def normalize(cls, settings):
-        to_upper = {}
-        for k, v in settings.items():
-            if not k.isupper():
-                to_upper[k] = v
-        for k, v in to_upper.items():
-            settings[k.upper()] = v
-            del settings[k]
+        for k in [k for k in settings if not k.isupper()]:
+            priority = settings.getpriority(k) or 'project'
+            settings.set(k.upper(), settings.pop(k), priority=priority)
 
     @classmethod
     def from_json(cls, settings, path):
@@ -215,6 +252,7 @@ class GlobalPersistence:
         self.thread.start()
 
         self.state = self.load_state()
+        self._state_dirty = True
 
         atexit.register(self.archive)
         atexit.register(self.close)
@@ -223,6 +261,8 @@ class GlobalPersistence:
 
     def worker(self, closing: Event):
         while not closing.wait(20):
+            if not self.freezer.buffer and not self._state_dirty:
+                continue
             try:
                 self.archive()
             except Exception as e:
@@ -230,8 +270,15 @@ class GlobalPersistence:
         self.archive()
 
     def archive(self):
-        self.freezer.flush()
-        self.dump_state()
+        if self.freezer.buffer:
+            # Registered state is mutated in place by its owners as requests
+            # are processed, so request activity is what marks it as dirty.
+            self._state_dirty = True
+            self.freezer.flush()
+        if self._state_dirty:
+            self._state_dirty = False
+            if not self.dump_state():
+                self._state_dirty = True
 
     def load_state(self):
         with suppress(FileNotFoundError, EOFError, gzip.BadGzipFile):
@@ -240,23 +287,34 @@ class GlobalPersistence:
         return {}
 
     def dump_state(self):
-        with gzip.open(self.path_state, 'wb+') as f, suppress(RuntimeError):
-            pickled = pickle.dumps(self.state)
-            f.write(pickled)
+        tmp = self.path_state.with_name(f'{self.path_state.name}.tmp')
+        try:
+            with open(tmp, 'wb') as raw, \
+                    gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=1) as gz, \
+                    io.BufferedWriter(gz, buffer_size=1 << 20) as f:
+                pickle.Pickler(f, protocol=5).dump(self.state)
+        except RuntimeError:
+            # State changed size while being pickled; the next tick tries again.
+            return False
+        os.replace(tmp, self.path_state)
+        return True
 
     def dump_opts(self):
         if 'CMDLINE_ARGS' not in self.settings:
             return
-        with open(self.path_opts, 'w+') as f:
-            json.dump(self.settings['CMDLINE_ARGS'], f)
+        _write_bytes(self.path_opts, _json_dumps(self.settings['CMDLINE_ARGS']))
 
     def register(self, obj, namespace, attrs):
+        state = self.state
+        prefix = f'{namespace}.'
         for attr in attrs:
-            key = f'{namespace}.{attr}'
-            if key in self.state:
-                setattr(obj, attr, self.state[key])
-                continue
-            self.state[key] = getattr(obj, attr)
+            key = prefix + attr
+            value = state.get(key, _MISSING)
+            if value is _MISSING:
+                state[key] = getattr(obj, attr)
+            else:
+                setattr(obj, attr, value)
+        self._state_dirty = True
 
     def freeze_request(self, request, spider=None):
         request.meta['_time_scheduled'] = time.time()
@@ -286,6 +344,17 @@ class GlobalPersistence:
 
 
 class RequestFreezer:
+    _io_pool = None
+
+    @classmethod
+    def io_pool(cls):
+        if cls._io_pool is None:
+            cls._io_pool = ThreadPoolExecutor(
+                max_workers=min(16, (os.cpu_count() or 4) * 2),
+                thread_name_prefix='freezer-io',
+            )
+        return cls._io_pool
+
     def __init__(self, path):
         self.wd = Path(path)
         self.path = self.wd / 'frozen'
@@ -313,20 +382,26 @@ class RequestFreezer:
 
     def flush(self):
         shelves = {}
+        original = {}
         buffer = self.buffer
         self.buffer = deque()
         for action, key, item in buffer:
             hash_ = sha1sum(pickle.dumps(key))
             label = hash_[:2]
             shelf = shelves.get(label)
-            if not shelf:
+            if shelf is None:
                 shelf = shelves[label] = self.open_shelf(label)
+            if hash_ not in original:
+                original[hash_] = shelf.get(hash_, _MISSING)
             if action == 'add':
                 shelf[hash_] = item
             if action == 'remove':
                 shelf.pop(hash_, None)
-        self.persist(shelves)
+        dirty = {hash_[:2] for hash_, v in original.items()
+                 if shelves[hash_[:2]].get(hash_, _MISSING) != v}
+        self.persist({label: shelves[label] for label in dirty})
         del shelves
+        del original
         del buffer
 
     def open_shelf(self, shelf, path=None):
@@ -353,8 +428,8 @@ class RequestFreezer:
             dstd.update(srcd)
             self.persist({shelf: dstd}, dst)
 
-        with ThreadPoolExecutor(max_workers=32) as executor:
-            executor.map(cp, [i + j for i, j in self.names()])
+        executor = self.io_pool()
+        wait([executor.submit(cp, shelf) for shelf in self.existing_names(src)])
 
     def defrost(self, spider):
         info = self.load_info()
@@ -378,29 +453,32 @@ class RequestFreezer:
 
     def load_info(self):
         info = {}
-        with suppress(EOFError, FileNotFoundError,
-                      json.JSONDecodeError, gzip.BadGzipFile):
-            with open(self.path / 'info.json') as f:
-                return json.load(f)
+        with suppress(EOFError, FileNotFoundError, _JSONDecodeError):
+            return _json_loads((self.path / 'info.json').read_bytes())
         return info
 
     def dump_info(self, info):
-        with open(self.path / 'info.json', 'w+') as f:
-            json.dump(info, f)
+        _write_bytes(self.path / 'info.json', _json_dumps(info))
 
     def names(self):
-        return permutations('0123456789abcdef', 2)
+        return _SHELF_NAMES
+
+    def existing_names(self, path=None):
+        try:
+            with os.scandir(path or self.path) as entries:
+                existing = {e.name for e in entries if len(e.name) == 2}
+        except FileNotFoundError:
+            return []
+        return [name for name in self.names() if name in existing]
 
     def __len__(self):
         length = 0
-        for i, j in self.names():
-            shelf = i + j
+        for shelf in self.existing_names():
             length += len(self.open_shelf(shelf))
         return length
 
     def iter_keys(self):
-        for i, j in self.names():
-            shelf = i + j
+        for shelf in self.existing_names():
             shelf = self.open_shelf(shelf)
             yield from shelf
 
@@ -410,8 +488,7 @@ class RequestDefroster(RequestFreezer):
         self.path = Path(path)
 
     def __iter__(self):
-        for i, j in self.names():
-            name = i + j
+        for name in self.existing_names():
             shelf = self.open_shelf(name)
             yield from shelf.values()
             with suppress(FileNotFoundError):
@@ -425,13 +502,9 @@ class ContribMiddleware(OptionsContributor):
         if not contrib_cls:
             raise NotConfigured()
 
-        contrib_cls = sorted(contrib_cls.items(), key=lambda t: t[1])
-        order = 400
-        normalized = {}
-        for k, v in contrib_cls:
-            normalized[k] = order
-            if order < 499:
-                order += 1
+        contrib_cls = sorted(contrib_cls, key=contrib_cls.get)
+        priorities = chain(range(400, 499), repeat(499))
+        normalized = dict(zip(contrib_cls, priorities))
 
         spider_mdws = crawler.settings['SPIDER_MIDDLEWARES']
         spider_mdws.update(normalized)
@@ -481,10 +554,10 @@ class RequestMetrics:
             raise NotConfigured()
         self.interval = interval
         self.stats = stats
-        self.scheduled_prio = deque(maxlen=maxlen)
-        self.scheduled_time = deque(maxlen=maxlen)
-        self.inprogress_prio = deque(maxlen=maxlen)
-        self.inprogress_time = deque(maxlen=maxlen)
+        self.scheduled_prio = RollingStats(maxlen)
+        self.scheduled_time = RollingStats(maxlen)
+        self.inprogress_prio = RollingStats(maxlen)
+        self.inprogress_time = RollingStats(maxlen)
 
     def spider_opened(self, spider):
         self.task = task.LoopingCall(self.update, spider)
@@ -500,19 +573,18 @@ class RequestMetrics:
         request.meta.setdefault('_time_scheduled', time.time())
         self.inprogress_time.append(request.meta['_time_scheduled'])
 
-    def calc_diff(self, q):
+    def calc_diff(self, q: RollingStats):
         if not q:
             return 0, 0, 0, 0
-        return min(q), max(q), mean(q), mode(q)
+        return q.min, q.max, q.mean, q.mode
 
-    def calc_time(self, q):
-        now = datetime.now()
+    def calc_time(self, q: RollingStats):
+        now = time.time()
         if not q:
             return timedelta(), timedelta(), timedelta()
-        ages = [now.timestamp() - v for v in q]
-        oldest = timedelta(seconds=max(ages))
-        newest = timedelta(seconds=min(ages))
-        avg_age = timedelta(seconds=mean(ages))
+        oldest = timedelta(seconds=now - q.min)
+        newest = timedelta(seconds=now - q.max)
+        avg_age = timedelta(seconds=now - q.mean)
         return oldest, newest, avg_age
 
     def update(self, spider=None):
@@ -531,6 +603,12 @@ class RequestMetrics:
 
 
 class LogStatsExtended(LogStats):
+    converters = {
+        float: lambda f: round(f, 2),
+        timedelta: fmttimedelta,
+        datetime: datetime.isoformat,
+    }
+
     @classmethod
     def from_crawler(cls, crawler):
         instance = super().from_crawler(crawler)
@@ -547,6 +625,8 @@ class LogStatsExtended(LogStats):
         self.history = {}
         self.width = 0
         self.window = 5
+        self._labels = {}
+        self._flat = ()
         self.add_stats(['response_received_count',
                         'requests_in_queue',
                         'requests_in_progress'],
@@ -563,32 +643,21 @@ class LogStatsExtended(LogStats):
         width = max(len(s) for s in ns) + 1
         self.width = max(width, self.width)
         self.history.update({k: deque(maxlen=self.window) for k in names})
-
-    def _log(self, names, values, rates):
-        converters = {
-            float: lambda f: round(f, 2),
-            timedelta: fmttimedelta,
-            datetime: datetime.isoformat,
-        }
-
-        for k in names:
-            n = f'{k}:'.ljust(self.width)
-            v = values[k]
-            v = converters.get(type(v), lambda v: v)(v)
-            if k in rates:
-                self.logger.info(f'  {n} {v} ({rates[k]:+.1f}/min)')
-            else:
-                self.logger.info(f'  {n} {v}')
+        self._flat = tuple((n, k) for n, keys in self.items.items() for k in keys)
+        self._labels = {k: f'{k}:'.ljust(self.width) for _, k in self._flat}
 
     def log(self, spider):
         self.stats.set_value('requests_in_queue', len(self.crawler.engine.slot.scheduler))
         self.stats.set_value('requests_in_progress', len(self.crawler.engine.slot.inprogress))
 
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+
         values = self.stats.get_stats()
-        values = {k: values.get(k, 0) for ns in self.items.values() for k in ns}
         rates = {}
 
-        for k, v in values.items():
+        for k in self._labels:
+            v = values.get(k, 0)
             if not isinstance(v, (int, float)):
                 continue
             history = self.history[k]
@@ -596,8 +665,24 @@ class LogStatsExtended(LogStats):
             if len(history) > 1:
                 rates[k] = (history[-1] - history[0]) / (len(history) - 1)
 
-        self.logger.info('')
-        for k, n in self.items.items():
-            self.logger.info(f'{k}:')
-            self._log(n, values, rates)
-            self.logger.info('')
+        info = self.logger.info
+        converters = self.converters
+        labels = self._labels
+        namespace = None
+        info('')
+        for ns, k in self._flat:
+            if ns != namespace:
+                if namespace is not None:
+                    info('')
+                info(f'{ns}:')
+                namespace = ns
+            v = values.get(k, 0)
+            convert = converters.get(type(v))
+            if convert:
+                v = convert(v)
+            if k in rates:
+                info(f'  {labels[k]} {v} ({rates[k]:+.1f}/min)')
+            else:
+                info(f'  {labels[k]} {v}')
+        if namespace is not None:
+            info('')
@@ -25,7 +25,6 @@ from __future__ import annotations
 import os
 import time
 from abc import ABC, abstractmethod
-from datetime import datetime
 from pprint import pformat
 from typing import Optional, Union
 
@@ -50,7 +49,7 @@ class FeedlyRSSSpider(Spider, ABC):
     }
 
     class SpiderConfig:
-        OUTPUT = f'./crawl.{datetime.now().strftime("%Y%m%d%H%M%S")}'
+        OUTPUT = None
 
         RSS = 'https://xkcd.com/atom.xml'
         RSS_TEMPLATES = {}
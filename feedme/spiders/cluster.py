@@ -21,23 +21,28 @@
 # SOFTWARE.
 
 import logging
-from collections import defaultdict
-from urllib.parse import urlsplit
+from collections import Counter, defaultdict
 
 from scrapy.crawler import Crawler
 from scrapy.exceptions import NotConfigured
 from scrapy.http import Request, TextResponse
+from scrapy.signals import spider_closed, spider_idle
 
 from ..datastructures import compose_mappings
 from ..docs import OptionsContributor
 from ..feedly import FeedlyEntry
 from ..signals import (register_state, request_finished, show_stats,
                        start_from_scratch)
+from ..urlkit import get_netloc, origin_id, url_origin
 from ..utils import SpiderOutput
 from ..utils import colored as _
 from .base import FeedlyRSSSpider
 
 
+def count_origins(urls) -> Counter:
+    return Counter(filter(None, map(url_origin, urls)))
+
+
 class ExplorationSpiderMiddleware:
     @classmethod
     def from_crawler(cls, crawler):
@@ -58,16 +63,42 @@ class ExplorationSpiderMiddleware:
         self.logger = logging.getLogger('explore')
         self._depth_limit = crawler.settings.getint('DEPTH_LIMIT', 1)
         self._threshold = crawler.settings.getint('EXPANSION_THRESHOLD', 0)
-        self._discovered = defaultdict(int)
+        self._discovered = Counter()
         self._scheduled = set()
         self._finished = set()
+        self._origin_by_id = {}
+        self._pending_stats = defaultdict(int)
+        self._ratio_updates = 0
 
         crawler.signals.connect(self.clear_state_info, start_from_scratch)
         crawler.signals.connect(self.update_finished, request_finished)
+        crawler.signals.connect(self.flush_stats, spider_idle)
+        crawler.signals.connect(self.flush_stats, spider_closed)
         crawler.signals.send_catch_log(
             register_state, obj=self, namespace='explore',
-            attrs=['_discovered', '_scheduled', '_finished'],
+            attrs=['_discovered', '_scheduled', '_finished', '_origin_by_id'],
         )
+        self.migrate_state()
+        origin_by_id = self._origin_by_id
+        for oid in self._scheduled & origin_by_id.keys():
+            del origin_by_id[oid]
+        self._eligible = {k for k in origin_by_id if self._discovered[k] > self._threshold}
+
+    def migrate_state(self):
+        # Older versions keyed nodes by their origin strings.
+        # Containers are updated in place since they are shared with the persistence extension.
+        for nodes in (self._scheduled, self._finished):
+            keys = [k for k in nodes if isinstance(k, str)]
+            nodes.difference_update(keys)
+            nodes.update(map(origin_id, keys))
+        discovered = self._discovered
+        scheduled = self._scheduled
+        for k in [k for k in discovered if isinstance(k, str)]:
+            v = discovered.pop(k)
+            oid = origin_id(k)
+            discovered[oid] += v
+            if discovered[oid] > self._threshold and oid not in scheduled:
+                self._origin_by_id[oid] = k
 
     def process_spider_output(self, response: TextResponse, result: SpiderOutput, spider):
         depth = response.meta.get('depth', 0)
@@ -77,7 +108,7 @@ class ExplorationSpiderMiddleware:
                 continue
             if 'item' in data:
                 item = data['item']
-                self.stats.inc_value('rss/page_count')
+                self._pending_stats['rss/page_count'] += 1
                 yield from self.process_item(response, item, depth, spider)
             yield data
 
@@ -86,12 +117,20 @@ class ExplorationSpiderMiddleware:
         item: FeedlyEntry, depth: int,
         spider,
     ):
-        dest = {urlsplit(k): v for k, v in item.hyperlinks.items()}
-        dest = {k: v for k, v in dest.items() if k.netloc}
-        self.stats.inc_value('rss/hyperlink_count', len(dest))
-
-        for u in dest:
-            self._discovered[f'{u.scheme}://{u.netloc}'] += 1
+        origins = count_origins(item.hyperlinks.all())
+        discovered = self._discovered
+        threshold = self._threshold
+        scheduled = self._scheduled
+        for origin, n in origins.items():
+            oid = origin_id(origin)
+            seen = discovered[oid] + n
+            discovered[oid] = seen
+            # Not just on the crossing: a resumed job may run with a lower threshold
+            # than the one its counts were collected under.
+            if seen > threshold and oid not in scheduled:
+                self._eligible.add(oid)
+                self._origin_by_id[oid] = origin
+        self._pending_stats['rss/hyperlink_count'] += sum(origins.values())
 
         if not self._depth_limit or depth < self._depth_limit:
             yield from self.schedule_new_nodes(item, depth, response.request, spider)
@@ -99,21 +138,23 @@ class ExplorationSpiderMiddleware:
         self.update_ratio()
 
     def schedule_new_nodes(self, item, depth, request, spider):
-        sites = ({u for u, v in self._discovered.items() if v > self._threshold}
-                 - self._scheduled)
+        sites = self._eligible - self._scheduled
         self._scheduled |= sites
+        self._eligible -= sites
         self.logger.debug(f'depth={depth}; +{len(sites)}')
 
-        for url in sites:
+        # probe_feed adds to the meta it is given, so each request gets its own copy.
+        base_meta = {
+            'inc_depth': 1,
+            'depth': depth,
+            'reason': 'newly_discovered',
+            'source_item': item,
+        }
+        probe = spider.probe_feed
+        for oid in sites:
+            url = self._origin_by_id.pop(oid)
             self.logger.debug(f'{url} (depth={depth})')
-            yield spider.probe_feed(
-                url, source=request,
-                meta={
-                    'inc_depth': 1,
-                    'depth': depth,
-                    'reason': 'newly_discovered',
-                    'source_item': item,
-                })
+            yield probe(url, source=request, meta=base_meta.copy())
 
     def update_finished(self, request: Request):
         if 'is_probe' in request.meta:
@@ -121,24 +162,38 @@ class ExplorationSpiderMiddleware:
         feed_url = request.meta.get('feed_url')
         if not feed_url:
             return
-        self._finished.add(urlsplit(feed_url).netloc)
-        self.stats.set_value('cluster/3_finished_nodes', len(self._finished))
+        self._finished.add(origin_id(get_netloc(feed_url)))
         self.update_ratio()
 
-    def update_ratio(self):
+    def update_ratio(self, every=100):
+        self._ratio_updates += 1
+        if self._ratio_updates % every:
+            return
+        self.flush_stats()
+
+    def flush_stats(self, spider=None):
+        stats = self.stats
+        pending = self._pending_stats
+        for k, v in pending.items():
+            stats.inc_value(k, v)
+        pending.clear()
+
         scheduled = len(self._scheduled)
-        self.stats.set_value('cluster/1_discovered_nodes', len(self._discovered))
-        self.stats.set_value('cluster/2_scheduled_nodes', scheduled)
-        finished = self.stats.get_value('cluster/3_finished_nodes', 0)
+        finished = len(self._finished)
+        stats.set_value('cluster/1_discovered_nodes', len(self._discovered))
+        stats.set_value('cluster/2_scheduled_nodes', scheduled)
+        stats.set_value('cluster/3_finished_nodes', finished)
         if not scheduled:
             return
         ratio = finished / scheduled
-        self.stats.set_value('cluster/4_explored', f'{ratio * 100:.2f}%')
+        stats.set_value('cluster/4_explored', f'{ratio * 100:.2f}%')
 
     def clear_state_info(self):
         self._discovered.clear()
+        self._eligible.clear()
         self._scheduled.clear()
         self._finished.clear()
+        self._origin_by_id.clear()
 
 
 class FeedClusterSpider(FeedlyRSSSpider, OptionsContributor, _doc_order=9):
@@ -176,13 +231,15 @@ class FeedClusterSpider(FeedlyRSSSpider, OptionsContributor, _doc_order=9):
                 yield self.next_page({'id': feed}, meta=meta, initial=True)
             return
 
-        select = self.config.get('SELECT_FEED_STATE', 'all')
+        strat = self.SELECTION_STRATS[self.config.get('SELECT_FEED_STATE', 'all')]
+        next_page = self.next_page
+        info = self.logger.info
         for feed, dead in feeds.items():
-            prio = self.SELECTION_STRATS[select][dead]
+            prio = strat[dead]
             if not prio:
-                self.logger.info(_(f'Dropped {"dead" if dead else "living"} feed {feed[5:]}', color='grey'))
+                info(_(f'Dropped {"dead" if dead else "living"} feed {feed[5:]}', color='grey'))
             else:
-                yield self.next_page({'id': feed}, meta=meta, initial=True, priority=prio)
+                yield next_page({'id': feed}, meta=meta, initial=True, priority=prio)
 
     @staticmethod
     def _help_options():
@@ -21,12 +21,15 @@
 # SOFTWARE.
 
 import re
+import time
 from pathlib import Path
 from typing import List
 from urllib.parse import unquote
 
 from scrapy.utils.url import add_http_if_no_scheme
 
+from ..urlkit import compile_templates
+
 
 def single_item(f):
     def wrapped(*args, **kwargs):
@@ -37,6 +40,8 @@ def single_item(f):
 class SettingsAdapter:
     @staticmethod
     def output(v):
+        if v is None:
+            v = f'./crawl.{time.strftime("%Y%m%d%H%M%S")}'
         p = Path(v)
         return {'OUTPUT': p, 'JOBDIR': p / 'scheduled/jobs'}
 
@@ -48,7 +53,7 @@ class SettingsAdapter:
     @staticmethod
     @single_item
     def rss_templates(conf):
-        return {re.compile(k): v for k, v in conf.items()}
+        return tuple((re.compile(k), compile_templates(v)) for k, v in conf.items())
 
     @staticmethod
     @single_item
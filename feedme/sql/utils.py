@@ -22,33 +22,31 @@
 
 
 def bulk_fetch(cur, size=100000, log=None):
-    i = 0
-    rows = cur.fetchmany(size)
-    while rows:
-        for row in rows:
-            i += 1
-            yield row
-        if log:
+    for i, row in enumerate(cur, 1):
+        yield row
+        if log and i % size == 0:
             log.info(f'Fetched {i} rows.')
-        rows = cur.fetchmany(size)
 
 
 def offset_fetch(conn, stmt, table, *, values=(), size=100000, log=None):
     i = 0
-    offset = 0
-    max_id = conn.execute(f'SELECT max(rowid) FROM {table}').fetchone()[0]
-    if not max_id:
-        raise StopIteration
-    while offset <= max_id:
-        limited = stmt % {'offset': (
-            f'{table}.rowid IN '
-            f'(SELECT rowid FROM {table} '
-            f'ORDER BY rowid LIMIT {size} OFFSET {offset})'
-        )}
-        rows = conn.execute(limited, values)
+    last_rowid = 0
+    next_bound = (f'SELECT max(rowid) FROM '
+                  f'(SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?)')
+    limited = stmt % {'offset': (
+        f'{table}.rowid > :_offset_lower AND {table}.rowid <= :_offset_upper'
+    )}
+    params = dict(values)
+    while True:
+        bound = conn.execute(next_bound, (last_rowid, size)).fetchone()[0]
+        if bound is None:
+            return
+        params['_offset_lower'] = last_rowid
+        params['_offset_upper'] = bound
+        rows = conn.execute(limited, params)
         for row in rows:
             i += 1
             yield row
         if log and i:
             log.info(f'Fetched {i} rows.')
-        offset += size
+        last_rowid = bound
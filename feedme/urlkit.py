@@ -20,28 +20,61 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import re
+from functools import lru_cache
+from hashlib import blake2b
 from typing import Tuple
 from urllib.parse import SplitResult, urlsplit
 
 from .datastructures import labeled_sequence
 
 
+HTTP_PREFIXES = ('http:', 'https:')
+
+
 def is_http(u):
-    return isinstance(u, str) and urlsplit(u).scheme in {'http', 'https'}
+    if not isinstance(u, str):
+        return False
+    if u[:6].lower().startswith(HTTP_PREFIXES):
+        return True
+    return urlsplit(u).scheme in {'http', 'https'}
 
 
 def is_absolute_http(u):
     if not isinstance(u, str):
         return False
+    if u[:6].lower().startswith(HTTP_PREFIXES):
+        return True
+    if u[:1] in {'/', '?', '#'} and u[:2] != '//':
+        return False
     s = urlsplit(u)
     return s.scheme in {'http', 'https'} or s.scheme == '' and s.netloc
 
 
 def ensure_protocol(u, protocol='http'):
+    if u[:6].lower().startswith(HTTP_PREFIXES):
+        return u
     s = urlsplit(u)
     return u if s.scheme else f'{protocol}:{u}'
 
 
+@lru_cache(maxsize=1 << 16)
+def get_netloc(u: str) -> str:
+    rest = u.partition('://')[2]
+    return rest.partition('/')[0].partition('?')[0].partition('#')[0]
+
+
+@lru_cache(maxsize=1 << 16)
+def url_origin(u: str) -> str:
+    s = urlsplit(u)
+    return f'{s.scheme}://{s.netloc}' if s.netloc else ''
+
+
+@lru_cache(maxsize=1 << 16)
+def origin_id(origin: str) -> int:
+    return int.from_bytes(blake2b(origin.encode(), digest_size=8).digest(), 'big')
+
+
 def domain_parents(domain: str) -> Tuple[str]:
     parts = domain.split('.')
     return tuple('.'.join(parts[-i:]) for i in range(len(parts), 1, -1))
@@ -55,28 +88,44 @@ def path_only(url: SplitResult) -> str:
     return url.geturl()[len(f'{url.scheme}://{url.netloc}'):]
 
 
+TEMPLATE_PLACEHOLDER = re.compile(r'%\((\w+)\)')
+
+DERIVED_SPECIFIERS = {
+    'network_path': no_scheme,
+    'path_query': path_only,
+    'original': SplitResult.geturl,
+}
+
+
+def compile_templates(templates):
+    if callable(templates):
+        return templates
+    if isinstance(templates, dict):
+        templates = [t for t, _ in sorted(templates.items(), key=lambda t: t[1])]
+    templates = tuple(templates)
+    placeholders = set(TEMPLATE_PLACEHOLDER.findall(''.join(templates)))
+    derived = tuple((k, f) for k, f in DERIVED_SPECIFIERS.items() if k in placeholders)
+
+    def format_urls(parsed: SplitResult, match):
+        specifiers = parsed._asdict()
+        for k, f in derived:
+            specifiers[k] = f(parsed)
+        specifiers.update(match.groupdict())
+        specifiers.update(labeled_sequence(match.groups(), start=1, as_str=True))
+        return [t % specifiers for t in templates]
+
+    return format_urls
+
+
 def select_templates(query, template_tree):
-    matches = {r: r.match(query) for r in template_tree}
-    matches = [(r, m) for r, m in matches.items() if m]
-    if not matches:
+    for pattern, templates in template_tree:
+        match = pattern.match(query)
+        if match:
+            break
+    else:
         raise ValueError('No template provider')
-    pattern, match = matches[0]
-    templates = template_tree[pattern]
-    if not callable(templates):
-        templates = [t[0] for t in templates.items()]
-    return match, templates
+    return match, compile_templates(templates)
 
 
 def build_urls(base, match, templates):
-    parsed = urlsplit(base)
-    if callable(templates):
-        return templates(parsed, match)
-    specifiers = {
-        **parsed._asdict(),
-        'network_path': no_scheme(parsed),
-        'path_query': path_only(parsed),
-        'original': parsed.geturl(),
-        **match.groupdict(),
-        **labeled_sequence(match.groups(), start=1, as_str=True),
-    }
-    return [t % specifiers for t in templates]
+    return compile_templates(templates)(urlsplit(base), match)
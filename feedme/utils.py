@@ -311,14 +311,15 @@ class HyperlinkStore(KeywordStore):
                 url = tag.attrib.get(attrib)
                 if not is_absolute_http(url):
                     continue
-                url = ensure_protocol(url)
+                parts = urlsplit(ensure_protocol(url))
+                parts = parts._replace(netloc=parts.netloc.lower(), fragment='')
+                url = parts.geturl()
 
                 keywords: KeywordCollection = {
                     'source': {source},
-                    'domain': set(domain_parents(urlsplit(url).netloc)),
-                    'tag': set(),
+                    'domain': set(domain_parents(parts.netloc)),
+                    'tag': {tag.xpath('name()').get()},
                 }
-                keywords['tag'].add(tag.xpath('name()').get())
                 self.put(url, **keywords, **kwargs)
 
 
@@ -3,9 +3,13 @@
 #
 # Deleting this file disables this feature, and deleting/renaming predefined
 # presets in this folder causes auto-load for that website to be disabled.
+#
+# _SITES_SUFFIX maps a domain suffix to a preset and is checked against the
+# host name of the feed URL. For anything more involved, a _SITES mapping of
+# regular expressions (matched against the whole URL) is also supported.
 
-_SITES = {
-    r'.*\.livejournal\.com/?.*': 'livejournal',
-    r'.*\.tumblr\.com/?.*': 'tumblr',
-    r'.*\.wordpress\.com/?.*': 'wordpress',
+_SITES_SUFFIX = {
+    '.livejournal.com': 'livejournal',
+    '.tumblr.com': 'tumblr',
+    '.wordpress.com': 'wordpress',
 }
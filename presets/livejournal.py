@@ -1,9 +1,9 @@
 DEPTH_LIMIT = 2
 
-FOLLOW_DOMAINS = {'livejournal.com'}
+FOLLOW_DOMAINS = frozenset({'livejournal.com'})
 
 RSS_TEMPLATES = {
-    r'.*\.livejournal\.com/?.*': {
+    r'https?://[^/?#]+\.livejournal\.com(?:[:/?#]|$)': {
         'http://%(netloc)s/data/rss': 100,
         'https://%(netloc)s/data/rss': 200,
         'http://%(netloc)s/data/atom': 300,
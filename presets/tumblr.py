@@ -1,32 +1,34 @@
 DEPTH_LIMIT = 2
 
-FOLLOW_DOMAINS = {'tumblr.com'}
+FOLLOW_DOMAINS = frozenset({'tumblr.com'})
 SELECT_FEED_STATE = 'dead+'
 
 
-def converter(base, match):
+def feed_urls(netloc):
     for scheme in ('http', 'https'):
         for ending in ('rss', 'rss#_=_'):
-            yield f'{scheme}://{base.netloc}/{ending}'
+            yield f'{scheme}://{netloc}/{ending}'
+
+
+def converter(base, match):
+    return feed_urls(base.netloc)
 
 
 def deactivated_converter(base, match):
-    for scheme in ('http', 'https'):
-        for ending in ('rss', 'rss#_=_'):
-            yield f'{scheme}://{match.group(1)}.tumblr.com/{ending}'
+    yield from feed_urls(f'{match.group(1)}.tumblr.com')
     yield from converter(base, match)
 
 
 RSS_TEMPLATES = {
-    r'https?://(.*)-deactivated\d*\.tumblr\.com/?.*': deactivated_converter,
-    r'.*\.tumblr\.com/?.*': converter,
+    r'https?://([^/?#]*)-deactivated\d*\.tumblr\.com(?:[:/?#]|$)': deactivated_converter,
+    r'https?://[^/?#]+\.tumblr\.com(?:[:/?#]|$)': converter,
 }
 
-TUMBLR_IGNORE = {
+TUMBLR_IGNORE = frozenset({
     'www.tumblr.com', 'staff.tumblr.com', 'tumblr.com',
     'engineering.tumblr.com', 'support.tumblr.com',
     'assets.tumblr.com',
-}
+})
 
 CONTRIB_SPIDER_MIDDLEWARES = {
     'feedme.contrib.filters.KeywordPrioritizer': 500,
@@ -1,6 +1,6 @@
 DEPTH_LIMIT = 2
 
-FOLLOW_DOMAINS = {'wordpress.com'}
+FOLLOW_DOMAINS = frozenset({'wordpress.com'})
 
 
 def template(base, match):
@@ -11,5 +11,5 @@ def template(base, match):
 
 
 RSS_TEMPLATES = {
-    r'.*\.wordpress\.com/?.*': template,
+    r'https?://[^/?#]+\.wordpress\.com(?:[:/?#]|$)': template,
 }